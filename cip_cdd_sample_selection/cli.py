@@ -1,43 +1,112 @@
 from __future__ import annotations
 
 import json
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Iterable, List, Optional
 
+import numpy as np
 import pandas as pd
 import typer
 
-from .sampling import SamplingConfig, sample_dataframe
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional fast JSON
+    orjson = None
+
+try:
+    import pyarrow
+    import pyarrow.csv as pacsv
+    import pyarrow.dataset as pads
+except ImportError:  # pragma: no cover - optional fast IO
+    pyarrow = None
+    pacsv = None
+    pads = None
+
+from .sampling import SamplingConfig, build_summary, select_sample, selection_frame
 
 app = typer.Typer(help="CIP/CDD sample selection CLI.")
 
 
 def _parse_stratify(stratify: List[str]) -> List[str]:
-    fields: List[str] = []
-    for item in stratify:
-        parts = [part.strip() for part in item.split(",") if part.strip()]
-        for part in parts:
-            if part not in fields:
-                fields.append(part)
-    return fields
+    parts = (part.strip() for item in stratify for part in item.split(","))
+    return list(dict.fromkeys(part for part in parts if part))
 
 
-def _read_input(path: Path, sheet: Optional[str]) -> pd.DataFrame:
+def _read_input(path: Path, sheet: Optional[str], columns: Optional[List[str]] = None) -> pd.DataFrame:
     if not path.exists():
         raise FileNotFoundError(f"Input file not found: {path}")
+    suffix = path.suffix.lower()
+    if suffix == ".parquet":
+        return pd.read_parquet(path, columns=columns)
+    if suffix == ".csv":
+        return pd.read_csv(path, usecols=columns)
+    # pandas' openpyxl reader already streams .xlsx/.xlsm workbooks in read-only mode.
     sheet_arg = sheet if sheet is not None else 0
-    return pd.read_excel(path, sheet_name=sheet_arg)
+    return pd.read_excel(path, sheet_name=sheet_arg, usecols=columns)
+
+
+def _projected_columns(path: Path, stratify_fields: List[str], id_column: Optional[str]) -> Optional[List[str]]:
+    """
+    Columns needed to select the sample, or None when the whole file should be read up front.
+
+    Only columnar (Parquet) inputs are projected: the selected rows are fetched afterwards with
+    _read_rows. Row-oriented formats have to be parsed in full either way, so they are read once.
+    """
+    if path.suffix.lower() != ".parquet" or pads is None:
+        return None
+    if not path.exists():
+        raise FileNotFoundError(f"Input file not found: {path}")
+    available = pads.dataset(path).schema.names
+    _validate_columns(available, stratify_fields, id_column)
+    return list(dict.fromkeys(stratify_fields + ([id_column] if id_column else [])))
+
+
+def _read_rows(path: Path, positions: np.ndarray) -> pd.DataFrame:
+    table = pads.dataset(path).take(pyarrow.array(positions, type=pyarrow.int64()))
+    return table.to_pandas().reset_index(drop=True)
 
 
-def _validate_columns(df: pd.DataFrame, stratify_fields: List[str], id_column: Optional[str]) -> None:
-    missing = [col for col in stratify_fields if col not in df.columns]
+def _validate_columns(columns: Iterable[str], stratify_fields: List[str], id_column: Optional[str]) -> None:
+    missing = [col for col in stratify_fields if col not in columns]
     if missing:
         raise ValueError(f"Stratify columns not found in input: {', '.join(missing)}")
-    if id_column and id_column not in df.columns:
+    if id_column and id_column not in columns:
         raise ValueError(f"ID column '{id_column}' not found in input.")
 
 
+def _write_csv(path: Path, df: pd.DataFrame, arrow_csv: bool = False) -> None:
+    if arrow_csv:
+        try:
+            table = pyarrow.Table.from_pandas(df, preserve_index=False)
+        except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError, pyarrow.ArrowNotImplementedError):
+            # Mixed-type object columns cannot be converted to Arrow; use the pandas writer.
+            pass
+        else:
+            pacsv.write_csv(table, str(path), write_options=pacsv.WriteOptions(quoting_style="needed"))
+            return
+    df.to_csv(path, index=False)
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _write_json(path: Path, summary: dict) -> None:
+    if orjson is not None:
+        options = orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        path.write_bytes(orjson.dumps(summary, default=_json_default, option=options))
+        return
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(summary, fh, indent=2, ensure_ascii=False, allow_nan=False, default=_json_default)
+
+
 def _print_overview(summary: dict) -> None:
     population_size = summary["population"]["size"]
     sample_size = summary["sample"]["size"]
@@ -56,7 +125,7 @@ def _print_overview(summary: dict) -> None:
 
 @app.command()
 def sample(
-    input: Path = typer.Option(..., "--input", "-i", help="Path to Excel file containing the population."),
+    input: Path = typer.Option(..., "--input", "-i", help="Population file: .parquet (recommended for large inputs), .csv, or Excel."),
     sheet: Optional[str] = typer.Option(None, "--sheet", "-t", help="Sheet name (defaults to the first sheet)."),
     stratify: List[str] = typer.Option(
         [],
@@ -80,11 +149,20 @@ def sample(
     output_dir: Path = typer.Option(Path("outputs"), help="Directory to write outputs."),
     seed: Optional[int] = typer.Option(42, help="Random seed for reproducibility."),
     no_random_start: bool = typer.Option(False, help="Disable random start for systematic sampling."),
+    skip_population_dist: bool = typer.Option(
+        False, help="Omit the per-stratum population distribution from the JSON summary (faster on large inputs)."
+    ),
+    arrow_csv: bool = typer.Option(
+        False, help="Write the sample CSV with pyarrow's faster writer (requires pyarrow; output format differs, see README)."
+    ),
 ) -> None:
+    if arrow_csv and pacsv is None:
+        raise ValueError("--arrow-csv requires pyarrow (pip install pyarrow).")
     stratify_fields = _parse_stratify(stratify)
     method = method.lower()
-    df = _read_input(input, sheet)
-    _validate_columns(df, stratify_fields, id_column)
+    columns = _projected_columns(input, stratify_fields, id_column)
+    df = _read_input(input, sheet, columns)
+    _validate_columns(df.columns, stratify_fields, id_column)
 
     cfg = SamplingConfig(
         method=method,
@@ -98,21 +176,27 @@ def sample(
         id_column=id_column,
         seed=seed,
         systematic_random_start=not no_random_start,
+        include_population_distribution=not skip_population_dist,
     )
 
-    sample_df, summary = sample_dataframe(df, cfg)
+    keyed = selection_frame(df, cfg)
+    positions, allocation_summary, planned_size = select_sample(keyed, cfg)
+    summary = build_summary(keyed, keyed.take(positions).reset_index(drop=True), allocation_summary, cfg, planned_size)
+    if columns is not None:
+        sample_df = _read_rows(input, positions)
+    else:
+        sample_df = df.take(positions).reset_index(drop=True)
 
     timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
     output_dir.mkdir(parents=True, exist_ok=True)
     sample_path = output_dir / f"sample_{timestamp}.csv"
     json_path = output_dir / f"sampling_summary_{timestamp}.json"
 
-    sample_df.to_csv(sample_path, index=False)
+    _write_csv(sample_path, sample_df, arrow_csv)
     summary["source"] = {"input_path": str(input.resolve()), "sheet_name": sheet}
     summary["outputs"] = {"sample_csv": str(sample_path.resolve()), "json_summary": str(json_path.resolve())}
 
-    with open(json_path, "w", encoding="utf-8") as fh:
-        json.dump(summary, fh, indent=2)
+    _write_json(json_path, summary)
 
     _print_overview(summary)
     typer.echo(f"Sample saved to: {sample_path}")
@@ -3,6 +3,7 @@ from __future__ import annotations
 import math
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
 from statistics import NormalDist
 from typing import Any, Dict, Iterable, List, Optional, Tuple
@@ -12,7 +13,6 @@ import pandas as pd
 
 
 Method = str
-_MISSING_VALUE = "<MISSING>"
 
 
 @dataclass
@@ -28,6 +28,7 @@ class SamplingConfig:
     id_column: Optional[str] = None
     seed: Optional[int] = 42
     systematic_random_start: bool = True
+    include_population_distribution: bool = True
 
     def sanitized_method(self) -> Method:
         allowed = {"statistical", "simple_random", "percentage", "systematic"}
@@ -36,6 +37,7 @@ class SamplingConfig:
         return self.method
 
 
+@lru_cache(maxsize=None)
 def z_score(confidence: float) -> float:
     if confidence <= 0 or confidence >= 1:
         raise ValueError("Confidence must be between 0 and 1 (exclusive).")
@@ -64,6 +66,8 @@ def calculate_statistical_sample_size(
 
 def resolve_sample_size(population_size: int, cfg: SamplingConfig) -> int:
     method = cfg.sanitized_method()
+    if cfg.systematic_step is not None and cfg.systematic_step <= 0:
+        raise ValueError("systematic_step must be a positive integer.")
     if population_size <= 0:
         return 0
 
@@ -104,154 +108,226 @@ def resolve_sample_size(population_size: int, cfg: SamplingConfig) -> int:
     return size
 
 
-def _normalize_key(values: Tuple[Any, ...]) -> Tuple[Any, ...]:
-    normalized = []
-    for value in values:
-        if pd.isna(value):
-            normalized.append(_MISSING_VALUE)
-        else:
-            normalized.append(value)
-    return tuple(normalized)
-
-
 def proportional_allocation(counts: pd.Series, total_size: int) -> Dict[Tuple, int]:
     """
     Allocate sample counts to strata proportionally, respecting capacity and total size.
     """
-    if total_size <= 0 or counts.sum() == 0:
-        return {idx: 0 for idx in counts.index}
+    allocated = _allocate(np.asarray(counts.to_numpy(), dtype=np.int64), total_size)
+    return {idx: int(val) for idx, val in zip(counts.index, allocated)}
+
 
-    raw = counts / counts.sum() * total_size
-    base = raw.apply(math.floor).astype(int)
+def _allocate(counts_arr: np.ndarray, total_size: int) -> np.ndarray:
+    population = int(counts_arr.sum())
+    if total_size <= 0 or population == 0:
+        return np.zeros(len(counts_arr), dtype=np.int64)
 
-    remainder = total_size - base.sum()
+    raw = counts_arr / population * total_size
+    base = np.floor(raw).astype(np.int64)
+
+    remainder = total_size - int(base.sum())
     if remainder > 0:
-        fractional = (raw - base).sort_values(ascending=False)
-        for idx in fractional.index[:remainder]:
-            base[idx] += 1
+        top = np.argsort(-(raw - base), kind="stable")[:remainder]
+        base[top] += 1
 
     # Ensure at least one per stratum when possible.
-    if total_size >= len(counts):
-        for idx, cnt in counts.items():
-            if cnt > 0 and base[idx] == 0:
-                base[idx] = 1
+    if total_size >= len(counts_arr):
+        base[(counts_arr > 0) & (base == 0)] = 1
 
     # Cap by stratum capacity.
-    capped = base.clip(upper=counts)
+    capped = np.minimum(base, counts_arr)
 
     # Adjust downward if we exceeded the total because of caps.
-    while capped.sum() > total_size:
-        excess = capped.sum() - total_size
-        reducible = capped[capped > 0].sort_values(ascending=False)
-        for idx in reducible.index:
-            if excess <= 0:
-                break
-            capped[idx] -= 1
-            excess -= 1
-
-    # Redistribute any leftover capacity.
-    target = min(total_size, int(counts.sum()))
-    while capped.sum() < target:
-        needed = target - capped.sum()
-        available = (counts - capped).sort_values(ascending=False)
-        if available.sum() == 0:
+    capped_total = int(capped.sum())
+    while capped_total > total_size:
+        excess = capped_total - total_size
+        order = np.argsort(-capped, kind="stable")
+        reducible = order[capped[order] > 0][:excess]
+        capped[reducible] -= 1
+        capped_total -= len(reducible)
+
+    # Redistribute any leftover capacity, one unit per stratum per round, largest headroom first.
+    target = min(total_size, population)
+    while capped_total < target:
+        needed = target - capped_total
+        available = counts_arr - capped
+        expandable = np.flatnonzero(available > 0)
+        if expandable.size == 0:
             break
-        for idx, remaining in available.items():
-            if needed <= 0:
-                break
-            if remaining > 0:
-                capped[idx] += 1
-                needed -= 1
+        if needed >= expandable.size:
+            # Every stratum with headroom gets a unit this round, so apply all such rounds at once.
+            rounds = min(needed // expandable.size, int(available[expandable].min()))
+            capped[expandable] += rounds
+            capped_total += rounds * expandable.size
+            continue
+        chosen = expandable[np.argsort(-available[expandable], kind="stable")][:needed]
+        capped[chosen] += 1
+        capped_total += len(chosen)
+
+    return capped
+
 
-    return {idx: int(val) for idx, val in capped.items()}
+def _expand_counts(counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Return, for ``counts[g]`` picks per group, each pick's group number and its rank within the group."""
+    owner = np.repeat(np.arange(len(counts)), counts)
+    rank = np.arange(len(owner)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owner, rank
+
+
+def _systematic_offsets(
+    sizes: np.ndarray, allocated: np.ndarray, cfg: SamplingConfig, rng: np.random.Generator
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Systematic selection for every group at once.
+
+    Returns the group number and within-group row offset of each pick. Groups allocated their
+    whole population are taken in full; the others get an interval and (optionally) a random start.
+    """
+    full = allocated >= sizes
+    if cfg.systematic_step:
+        steps = np.full(len(sizes), cfg.systematic_step, dtype=np.int64)
+    else:
+        steps = -(-sizes // np.maximum(allocated, 1))
+    steps[full] = 1
+    starts = np.zeros(len(sizes), dtype=np.int64)
+    drawn = ~full & (allocated > 0)
+    if cfg.systematic_random_start and drawn.any():
+        starts[drawn] = rng.integers(0, steps[drawn])
+    counts = np.minimum(allocated, np.maximum(sizes - starts + steps - 1, 0) // steps)
+    owner, rank = _expand_counts(counts)
+    return owner, starts[owner] + steps[owner] * rank
+
+
+def _systematic_positions(
+    population_size: int, desired_size: int, cfg: SamplingConfig, rng: np.random.Generator
+) -> np.ndarray:
+    _, offsets = _systematic_offsets(
+        np.array([population_size], dtype=np.int64), np.array([desired_size], dtype=np.int64), cfg, rng
+    )
+    return offsets
 
 
 def systematic_sample(df: pd.DataFrame, desired_size: int, cfg: SamplingConfig, rng: np.random.Generator) -> pd.DataFrame:
     if desired_size <= 0 or df.empty:
         return df.iloc[0:0]
-    population_size = len(df)
-    if desired_size >= population_size:
+    if desired_size >= len(df):
         return df.copy()
-
-    step = cfg.systematic_step or math.ceil(population_size / desired_size)
-    start = rng.integers(0, step) if cfg.systematic_random_start else 0
-    indices = list(range(start, population_size, step))[:desired_size]
-    return df.iloc[indices]
+    return df.take(_systematic_positions(len(df), desired_size, cfg, rng))
 
 
-def random_sample(df: pd.DataFrame, desired_size: int, seed: Optional[int]) -> pd.DataFrame:
-    if desired_size <= 0 or df.empty:
-        return df.iloc[0:0]
-    desired_size = min(len(df), desired_size)
-    return df.sample(n=desired_size, random_state=seed)
+def random_sample_positions(population_size: int, desired_size: int, rng: np.random.Generator) -> np.ndarray:
+    if desired_size <= 0 or population_size <= 0:
+        return np.empty(0, dtype=np.int64)
+    desired_size = min(population_size, desired_size)
+    return rng.choice(population_size, size=desired_size, replace=False)
 
 
-def stratified_sample(
+def stratified_positions(
     df: pd.DataFrame,
     cfg: SamplingConfig,
     rng: np.random.Generator,
     desired_size: Optional[int] = None,
-) -> Tuple[pd.DataFrame, List[Dict[str, Any]]]:
+) -> Tuple[np.ndarray, List[Dict[str, Any]]]:
     stratify_fields = cfg.stratify_fields
     total_size = resolve_sample_size(len(df), cfg) if desired_size is None else desired_size
     if total_size <= 0:
-        return df.iloc[0:0], []
-
-    group_counts = df.groupby(stratify_fields, dropna=False).size()
-    normalized_index = [
-        _normalize_key(idx if isinstance(idx, tuple) else (idx,)) for idx in group_counts.index
+        return np.empty(0, dtype=np.int64), []
+
+    grouped = df.groupby(stratify_fields, dropna=False, observed=True)
+    group_sizes = grouped.size()
+    sizes = group_sizes.to_numpy(dtype=np.int64)
+    allocated = _allocate(sizes, total_size)
+    actual_total = int(allocated.sum())
+
+    # Draw every stratum in one vectorized pass. Rows are ordered by group code (GroupBy.indices
+    # omits the missing-value group of categorical keys, so it is not used); within a group they
+    # keep population order for systematic selection, or a random order whose leading rows form
+    # the random sample.
+    codes = grouped.ngroup().to_numpy()
+    if cfg.method == "systematic":
+        row_order = np.argsort(codes, kind="stable")
+        owner, offsets = _systematic_offsets(sizes, allocated, cfg, rng)
+    else:
+        row_order = np.lexsort((rng.random(len(codes)), codes))
+        owner, offsets = _expand_counts(allocated)
+    selected = row_order[(np.cumsum(sizes) - sizes)[owner] + offsets]
+
+    sampled = allocated > 0
+    strata = _stratum_records(stratify_fields, group_sizes.index.to_frame(index=False)[sampled])
+    population_counts = sizes[sampled].tolist()
+    sample_counts = np.bincount(owner, minlength=len(sizes))[sampled].tolist()
+    allocation_summary: List[Dict[str, Any]] = [
+        {
+            "stratum": stratum,
+            "population_count": population_count,
+            "sample_count": sample_count,
+            "share_of_population": population_count / len(df) if len(df) else 0,
+            "share_of_sample": sample_count / actual_total if actual_total else 0,
+        }
+        for stratum, population_count, sample_count in zip(strata, population_counts, sample_counts)
     ]
-    normalized_counts = pd.Series(group_counts.values, index=pd.Index(normalized_index))
-    allocations = proportional_allocation(normalized_counts, total_size)
-    actual_total = sum(allocations.values())
-
-    samples = []
-    allocation_summary: List[Dict[str, Any]] = []
-    for idx, group_df in df.groupby(stratify_fields, dropna=False):
-        stratum_key = idx if isinstance(idx, tuple) else (idx,)
-        allocated = allocations.get(_normalize_key(stratum_key), 0)
-        if allocated <= 0:
-            continue
-        if cfg.method == "systematic":
-            sample_df = systematic_sample(group_df, allocated, cfg, rng)
-        else:
-            sample_df = random_sample(group_df, allocated, cfg.seed)
-        samples.append(sample_df)
-        allocation_summary.append(
-            {
-                "stratum": _stratum_dict(stratify_fields, stratum_key),
-                "population_count": int(len(group_df)),
-                "sample_count": int(len(sample_df)),
-                "share_of_population": len(group_df) / len(df) if len(df) else 0,
-                "share_of_sample": len(sample_df) / actual_total if actual_total else 0,
-            }
-        )
+    return selected, allocation_summary
 
-    if samples:
-        combined = pd.concat(samples, axis=0).reset_index(drop=True)
-    else:
-        combined = df.iloc[0:0]
-    return combined, allocation_summary
 
+def stratified_sample(
+    df: pd.DataFrame,
+    cfg: SamplingConfig,
+    rng: np.random.Generator,
+    desired_size: Optional[int] = None,
+) -> Tuple[pd.DataFrame, List[Dict[str, Any]]]:
+    positions, allocation_summary = stratified_positions(df, cfg, rng, desired_size=desired_size)
+    return df.take(positions).reset_index(drop=True), allocation_summary
 
-def sample_dataframe(df: pd.DataFrame, cfg: SamplingConfig) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+
+def categorize_strata(df: pd.DataFrame, stratify_fields: Iterable[str]) -> pd.DataFrame:
+    """
+    Return ``df`` with string stratify columns cast to categoricals so repeated groupbys work on integer codes.
+    """
+    converted = {
+        field: df[field].astype("category")
+        for field in stratify_fields
+        if df[field].dtype == object or isinstance(df[field].dtype, pd.StringDtype)
+    }
+    return df.assign(**converted) if converted else df
+
+
+def selection_frame(df: pd.DataFrame, cfg: SamplingConfig) -> pd.DataFrame:
+    """
+    Narrow ``df`` to the stratify and ID columns, with string strata categorized.
+
+    Selection and the summary read nothing else, so the rest of the population is never copied.
+    """
+    columns = list(dict.fromkeys(cfg.stratify_fields + ([cfg.id_column] if cfg.id_column else [])))
+    return categorize_strata(df[columns], cfg.stratify_fields)
+
+
+def select_sample(df: pd.DataFrame, cfg: SamplingConfig) -> Tuple[np.ndarray, List[Dict[str, Any]], int]:
+    """
+    Choose the sample as row positions into ``df``.
+
+    Returns the selected positions, the per-stratum allocation summary, and the planned sample size.
+    Only the stratify and ID columns of ``df`` are read, so callers may pass a column projection.
+    """
     desired_size = resolve_sample_size(len(df), cfg)
     if desired_size <= 0 and len(df) > 0:
         raise ValueError("Calculated sample size is 0. Adjust parameters to select at least one record.")
 
     rng = np.random.default_rng(cfg.seed)
     if cfg.stratify_fields:
-        sample_df, allocation_summary = stratified_sample(df, cfg, rng, desired_size=desired_size)
+        positions, allocation_summary = stratified_positions(df, cfg, rng, desired_size=desired_size)
     else:
         if cfg.method == "systematic":
-            sample_df = systematic_sample(df, desired_size, cfg, rng)
+            positions = _systematic_positions(len(df), desired_size, cfg, rng)
         else:
-            sample_df = random_sample(df, desired_size, cfg.seed)
+            positions = random_sample_positions(len(df), desired_size, rng)
         allocation_summary = []
+    return positions, allocation_summary, desired_size
 
-    sample_df = sample_df.reset_index(drop=True)
-    summary = build_summary(df, sample_df, allocation_summary, cfg, desired_size)
-    return sample_df, summary
+
+def sample_dataframe(df: pd.DataFrame, cfg: SamplingConfig) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    keyed = selection_frame(df, cfg)
+    positions, allocation_summary, desired_size = select_sample(keyed, cfg)
+    summary = build_summary(keyed, keyed.take(positions).reset_index(drop=True), allocation_summary, cfg, desired_size)
+    return df.take(positions).reset_index(drop=True), summary
 
 
 def build_summary(
@@ -281,7 +357,9 @@ def build_summary(
         "stratify_fields": stratify_fields,
         "population": {
             "size": int(len(population_df)),
-            "distribution": distribution(population_df, stratify_fields),
+            "distribution": (
+                distribution(population_df, stratify_fields) if cfg.include_population_distribution else None
+            ),
         },
         "sample": {
             "size": int(len(sample_df)),
@@ -291,7 +369,8 @@ def build_summary(
     }
 
     if cfg.id_column and cfg.id_column in sample_df.columns:
-        summary["sample_ids"] = sample_df[cfg.id_column].tolist()
+        ids = sample_df[cfg.id_column]
+        summary["sample_ids"] = [None if missing else value for value, missing in zip(ids.tolist(), ids.isna().tolist())]
 
     return summary
 
@@ -301,29 +380,39 @@ def distribution(df: pd.DataFrame, stratify_fields: Iterable[str]) -> List[Dict[
     if not fields or df.empty:
         return []
     total = len(df)
-    grouped = df.groupby(fields, dropna=False).size().reset_index(name="count")
-    records: List[Dict[str, Any]] = []
-    for _, row in grouped.iterrows():
-        stratum_values = tuple(row[field] for field in fields)
-        records.append(
-            {
-                "stratum": _stratum_dict(fields, stratum_values),
-                "count": int(row["count"]),
-                "share": float(row["count"] / total),
-            }
-        )
-    return records
-
-
-def _stratum_dict(fields: List[str], values: Tuple[Any, ...]) -> Dict[str, Any]:
-    cleaned = {}
-    for field, value in zip(fields, values):
-        if pd.isna(value):
-            cleaned[field] = None
-        elif isinstance(value, pd.Timestamp):
-            cleaned[field] = value.isoformat()
-        elif isinstance(value, np.generic):
-            cleaned[field] = value.item()
-        else:
-            cleaned[field] = value
-    return cleaned
+    grouped = df.groupby(fields, dropna=False, observed=True).size().reset_index(name="count")
+    counts = grouped["count"].tolist()
+    return [
+        {
+            "stratum": stratum,
+            "count": count,
+            "share": count / total,
+        }
+        for stratum, count in zip(_stratum_records(fields, grouped), counts)
+    ]
+
+
+def _stratum_records(fields: List[str], keys: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Convert one row of stratum values per group into JSON-ready dicts, cleaning each column once."""
+    columns = [_clean_column(keys[field]) for field in fields]
+    return [dict(zip(fields, values)) for values in zip(*columns)]
+
+
+def _clean_column(values: pd.Series) -> List[Any]:
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        categories = _clean_column(pd.Series(values.cat.categories))
+        return [None if code < 0 else categories[code] for code in values.cat.codes.tolist()]
+    missing = values.isna().tolist()
+    if pd.api.types.is_datetime64_any_dtype(values.dtype):
+        cleaned = [None if value is pd.NaT else value.isoformat() for value in values.tolist()]
+    elif values.dtype == object:
+        cleaned = [_clean_value(value) for value in values.tolist()]
+    else:
+        cleaned = values.tolist()
+    return [None if is_missing else value for value, is_missing in zip(cleaned, missing)]
+
+
+def _clean_value(value: Any) -> Any:
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return value